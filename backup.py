@@ -2,20 +2,54 @@
 """iCloud Drive Backup – Synchronisiert iCloud Drive Ordner auf ein lokales Zielverzeichnis."""
 
 import argparse
+import bisect
 import fnmatch
+import functools
 import json
 import logging
 import os
+import re
 import sys
+import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 from datetime import datetime, timezone
 from pathlib import Path
 from shutil import copyfileobj
 
 import yaml
+from pyicloud import PyiCloudService
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 log = logging.getLogger("icloud-drive-backup")
 
+# YAML-Parser: libyaml-basiert (CSafeLoader), falls PyYAML damit gebaut ist
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Format-Version der State-Datei; States mit anderer Version werden verworfen
+STATE_VERSION = 3
+
+# Maximale Anzahl wartender Downloads, bevor der Scan pausiert. Begrenzt nur
+# den Speicher: bei Abbruch oder Fehler werden wartende Downloads verworfen
+MAX_PENDING_DOWNLOADS = 1000
+
+# Blockgröße beim Kopieren des Download-Streams in die Zieldatei
+DOWNLOAD_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Abstand (Sekunden), in dem lange Syncs einen Zwischenstand des States sichern
+CHECKPOINT_INTERVAL = 300
+
 
 # ---------------------------------------------------------------------------
 # Konfiguration
@@ -28,13 +62,29 @@ def load_config(path: str) -> dict:
         log.error("Konfigurationsdatei nicht gefunden: %s", config_path)
         sys.exit(1)
     with open(config_path, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
+        return yaml.load(f, Loader=_YAML_LOADER)
 
 
 # ---------------------------------------------------------------------------
 # iCloud-Authentifizierung
 # ---------------------------------------------------------------------------
 
+# Zeichen, die pyicloud beim Dateinamen der Session entfernt (alles außer \w)
+_NON_WORD_RE = re.compile(r"\W")
+
+
+@functools.lru_cache(maxsize=32)
+def _cookie_dir(cookie_directory: str | None) -> str:
+    """Expandiertes Session-Verzeichnis für pyicloud.
+
+    pyicloud speichert Session-Dateien als Flat-Files im cookie_directory:
+      <dir>/<normalized_username>.session
+      <dir>/<normalized_username>.cookiejar
+    Standard von pyicloud ist ~/.pyicloud/
+    """
+    return os.path.expanduser(cookie_directory or "~/.pyicloud")
+
+
 def authenticate(username: str, password: str | None = None, cookie_directory: str | None = None,
                  interactive: bool = False):
     """Erstellt eine authentifizierte PyiCloudService-Instanz.
@@ -43,23 +93,14 @@ def authenticate(username: str, password: str | None = None, cookie_directory: s
     Bei interactive=True wird bei fehlendem Token/2FA interaktiv nach
     Passwort und 2FA-Code gefragt.
     """
-    from pyicloud import PyiCloudService
-
-    # pyicloud speichert Session-Dateien als Flat-Files im cookie_directory:
-    #   <dir>/<normalized_username>.session
-    #   <dir>/<normalized_username>.cookiejar
-    # Standard von pyicloud ist ~/.pyicloud/
-    if cookie_directory:
-        cookie_dir = os.path.expanduser(cookie_directory)
-    else:
-        cookie_dir = os.path.expanduser("~/.pyicloud")
+    cookie_dir = _cookie_dir(cookie_directory)
 
     kwargs = {"apple_id": username, "cookie_directory": cookie_dir}
     if password:
         kwargs["password"] = password
 
     # Dateinamen, den pyicloud verwenden wird (nur Wortzeichen aus der Apple-ID)
-    normalized = "".join(c for c in username if c.isalnum() or c == "_")
+    normalized = _NON_WORD_RE.sub("", username)
     log.info("Authentifiziere als %s (Token: %s/%s.session)", username, cookie_dir, normalized)
 
     try:
@@ -94,6 +135,53 @@ def authenticate(username: str, password: str | None = None, cookie_directory: s
     return api
 
 
+# Serialisiert das Speichern der pyicloud-Session (Session-Datei + Cookiejar)
+_SESSION_SAVE_LOCK = threading.Lock()
+
+
+def guard_session_persistence(api) -> None:
+    """Macht das Speichern der pyicloud-Session threadsicher.
+
+    pyicloud schreibt nach jedem Request die Session-Datei und den Cookiejar
+    im cookie_directory neu. Bei parallelen Scans und Downloads würden diese
+    Dateien gleichzeitig geschrieben und könnten beschädigt werden – pyicloud
+    verwirft die Session dann beim nächsten Lauf (erneut Passwort/2FA nötig).
+    Der Lock umschließt nur das Speichern, die Requests laufen weiter parallel.
+    Kennt die pyicloud-Version kein _save_session_data, wird request() selbst
+    serialisiert (der Body von Streaming-Downloads wird trotzdem parallel gelesen).
+    """
+    session = getattr(api, "session", None)
+    if session is None:
+        log.debug("pyicloud-Session nicht gefunden, Session-Speicherung unverändert")
+        return
+    name = "_save_session_data" if hasattr(session, "_save_session_data") else "request"
+    target = getattr(session, name)
+
+    @functools.wraps(target)
+    def locked(*args, **kwargs):
+        with _SESSION_SAVE_LOCK:
+            return target(*args, **kwargs)
+
+    setattr(session, name, locked)
+
+
+def configure_http_pool(api, pool_size: int) -> None:
+    """Vergrößert den HTTP-Connection-Pool der pyicloud-Session.
+
+    requests hält standardmäßig nur 10 Verbindungen pro Host offen. Bei
+    parallelen Scans und Downloads warten Threads sonst auf eine freie
+    Verbindung bzw. bauen für jede Datei neue TLS-Verbindungen auf.
+    Verbindungsfehler werden bis zu 3x mit Backoff wiederholt.
+    """
+    session = getattr(api, "session", None)
+    if session is None:
+        log.debug("pyicloud-Session nicht gefunden, Connection-Pool unverändert")
+        return
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                          max_retries=Retry(total=3, backoff_factor=0.5))
+    session.mount("https://", adapter)
+
+
 # ---------------------------------------------------------------------------
 # Drive-Navigation
 # ---------------------------------------------------------------------------
@@ -122,34 +210,143 @@ def resolve_drive_folder(drive, folder_path: str):
 def _state_path(destination: str, folder_path: str) -> Path:
     """Pfad zur State-Datei für einen Sync-Ordner."""
     safe_name = folder_path.strip("/").replace("/", "_") or "root"
-    return Path(destination) / f".icloud-backup-state-{safe_name}.json"
+    suffix = "msgpack" if msgpack else "json"
+    return Path(destination) / f".icloud-backup-state-{safe_name}.{suffix}"
+
+
+def _empty_state() -> dict:
+    """Leerer Sync-State (kein Ordner im Cache)."""
+    return {"version": STATE_VERSION, "folder_etags": {}, "folder_files": {},
+            "file_meta": {}}
+
+
+def _json_loads(data: bytes):
+    """Parst JSON-Bytes – mit orjson, falls installiert (deutlich schneller)."""
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps(obj) -> bytes:
+    """Serialisiert kompaktes JSON (ohne Einrückung) als Bytes."""
+    if orjson:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
 
 
 def load_state(destination: str, folder_path: str) -> dict:
-    """Lädt den gespeicherten Sync-State (etags + Dateilisten)."""
+    """Lädt den gespeicherten Sync-State (etags + Dateilisten).
+
+    folder_files enthält pro Ordner die Pfade seiner Dateien relativ zum
+    Ordner selbst, NUL-getrennt in einem String (z.B. "Sub" → "a.txt\0Deep/b.txt").
+    file_meta enthält pro Datei [Größe, Änderungszeit] von iCloud, wie sie
+    beim letzten Sync lokal vorlagen (siehe remote_meta).
+    """
     path = _state_path(destination, folder_path)
     if path.exists():
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, OSError) as exc:
+            raw = path.read_bytes()
+            state = msgpack.unpackb(raw, raw=False) if msgpack else _json_loads(raw)
+        except (ValueError, OSError) as exc:
             log.warning("State-Datei beschädigt, starte mit leerem Cache: %s", exc)
-    return {"folder_etags": {}, "folder_files": {}}
+        else:
+            if isinstance(state, dict) and state.get("version") == STATE_VERSION:
+                return state
+            log.info("State-Datei hat ein älteres Format, starte mit leerem Cache: %s", path)
+    return _empty_state()
 
 
 def save_state(destination: str, folder_path: str, state: dict) -> None:
-    """Speichert den Sync-State nach erfolgreichem Durchlauf."""
+    """Speichert den Sync-State (Zwischenstand oder nach erfolgreichem Durchlauf).
+
+    Mit msgpack binär, sonst als kompaktes JSON (ohne Einrückung). Geschrieben
+    wird in eine temporäre Datei, die anschließend per os.replace atomar an
+    die Stelle der alten tritt – ein Abbruch hinterlässt nie einen halben State.
+    """
     path = _state_path(destination, folder_path)
     path.parent.mkdir(parents=True, exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(state, f, indent=2)
+    if msgpack:
+        data = msgpack.packb(state, use_bin_type=True)
+    else:
+        data = _json_dumps(state)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+    # Alte JSON-State-Datei (vor msgpack) wird nie mehr gelesen – entfernen
+    if msgpack:
+        try:
+            os.unlink(path.with_suffix(".json"))
+        except FileNotFoundError:
+            pass
+
+
+def _checkpoint_state(cached_state: dict, new_state: dict) -> dict:
+    """Zwischenstand für einen laufenden Sync: neuer State über dem alten.
+
+    new_state enthält nur fertig gescannte Ordner und erledigte Dateien; für
+    alles andere bleiben die Einträge des letzten Syncs gültig.
+    """
+    state = _empty_state()
+    for key in ("folder_etags", "folder_files", "file_meta"):
+        state[key] = {**cached_state.get(key, {}), **new_state[key]}
+    return state
 
 
-def is_excluded(rel_path: str, full_path: str, excludes: list[str]) -> bool:
+def compile_excludes(excludes: list[str]) -> tuple:
+    """Bereitet die Exclude-Pattern einmalig für is_excluded vor.
+
+    Gibt ein Tupel (literals, prefixes, suffixes, glob_re) zurück:
+      literals: frozenset der Pfade ohne Wildcards (exakter Treffer)
+      prefixes: Tupel "<pfad>/" für den Präfix-Test (Unterpfade)
+      suffixes: Tupel der Endungen einfacher Pattern wie "*.tmp"
+      glob_re:  alle übrigen Glob-Pattern als eine kompilierte
+                Regex-Alternation (None, wenn es keine gibt)
+
+    Das Ergebnis ist unveränderlich und wird pro Pattern-Liste gecacht, d.h.
+    alle Folder eines Jobs teilen sich dieselben kompilierten Pattern.
+    """
+    return _compile_excludes(tuple(excludes))
+
+
+@functools.lru_cache(maxsize=32)
+def _compile_excludes(excludes: tuple[str, ...]) -> tuple:
+    wildcards = {"*", "?", "["}
+    literals = set()
+    suffixes = set()
+    globs = []
+    for pattern in excludes:
+        if not set(pattern) & wildcards:
+            literals.add(pattern.rstrip("/"))
+        elif pattern.startswith("*") and not set(pattern[1:]) & (wildcards | {"/"}):
+            # "*<endung>" ist ein reiner Endungs-Test. Ohne "/" in der Endung
+            # genügt es, den letzten Pfadteil zu prüfen: endet rel_path oder
+            # full_path darauf, dann auch der Dateiname.
+            suffixes.add(pattern[1:])
+        else:
+            globs.append(pattern)
+    prefixes = tuple(sorted(p + "/" for p in literals))
+    # fnmatch.translate() verankert jedes Pattern selbst am Ende, die
+    # Alternation kann daher direkt mit re.match geprüft werden.
+    glob_re = None
+    if globs:
+        glob_re = re.compile("|".join(f"(?:{fnmatch.translate(p)})" for p in globs))
+    return frozenset(literals), prefixes, tuple(sorted(suffixes)), glob_re
+
+
+def is_excluded(rel_path: str, full_path: str, compiled: tuple,
+                name: str | None = None) -> bool:
     """Prüft ob ein Pfad durch ein Exclude-Pattern ausgeschlossen wird.
 
     rel_path:  Pfad relativ zum synced Folder (z.B. "Projects/Old")
     full_path: Voller Pfad ab iCloud-Drive-Root (z.B. "Documents/Projects/Old")
+    compiled:  Ergebnis von compile_excludes()
+    name:      Letzter Pfadteil, falls die übergeordneten Ordner bereits
+               geprüft wurden (walk_remote) – dann wird nur dieser Teil
+               einzeln gegen die Glob-Pattern getestet.
 
     Pattern werden gegen beide Pfade geprüft:
       - "Projects"           → matcht Projects in jedem synced Folder
@@ -157,104 +354,212 @@ def is_excluded(rel_path: str, full_path: str, excludes: list[str]) -> bool:
       - ".git"               → Glob: matcht jeden Pfadteil namens ".git"
       - "*.tmp"              → Glob: matcht alle .tmp-Dateien
     """
-    for pattern in excludes:
-        # Pattern mit Wildcard/Glob-Zeichen
-        if any(c in pattern for c in "*?["):
-            # Gegen beide Pfade matchen
-            if fnmatch.fnmatch(rel_path, pattern) or fnmatch.fnmatch(full_path, pattern):
-                return True
-            # Gegen jeden einzelnen Pfadteil matchen (z.B. ".git" in "a/.git/config")
-            for part in full_path.split("/"):
-                if fnmatch.fnmatch(part, pattern):
-                    return True
-        else:
-            pattern_stripped = pattern.rstrip("/")
-            # Gegen relativen Pfad (innerhalb des Folders)
-            if rel_path == pattern_stripped or rel_path.startswith(pattern_stripped + "/"):
-                return True
-            # Gegen vollen Pfad (ab iCloud-Drive-Root)
-            if full_path == pattern_stripped or full_path.startswith(pattern_stripped + "/"):
-                return True
-    return False
-
+    literals, prefixes, suffixes, glob_re = compiled
+    # Pattern ohne Wildcards: exakter Pfad oder Unterpfad davon
+    if rel_path in literals or full_path in literals:
+        return True
+    if rel_path.startswith(prefixes) or full_path.startswith(prefixes):
+        return True
+    if not suffixes and glob_re is None:
+        return False
+    # Glob-Pattern zuerst gegen die einzelnen Pfadteile (z.B. ".git" in
+    # "a/.git/config"), dann gegen beide vollständigen Pfade matchen.
+    # Endungs-Pattern sind ein günstiger str.endswith-Test vor der Regex.
+    parts = (name,) if name is not None else full_path.split("/")
+    if suffixes and any(part.endswith(suffixes) for part in parts):
+        return True
+    if glob_re is None:
+        return False
+    if any(glob_re.match(part) for part in parts):
+        return True
+    return bool(glob_re.match(rel_path) or glob_re.match(full_path))
 
-def walk_remote(node, rel_path: str = "", folder_path: str = "",
-                excludes: list[str] | None = None,
-                cached_state: dict | None = None, new_state: dict | None = None,
-                _counter: list | None = None) -> list[tuple[str, object]]:
-    """Durchläuft rekursiv einen iCloud Drive Ordner.
 
-    rel_path:    Pfad relativ zum synced Folder (z.B. "Sub/Dir")
-    folder_path: Top-Level-Folder aus der Config (z.B. "Documents")
+def is_folder_excluded(folder_path: str, compiled: tuple) -> bool:
+    """Prüft ob ein synced Folder als Ganzes ausgeschlossen ist.
 
-    Gibt eine Liste von (relativer_pfad, DriveNode|None) Tupeln zurück (nur Dateien).
-    Bei Cache-Treffern ist der DriveNode None (Datei ist unverändert).
+    Trifft zu, wenn is_excluded() jeden Pfad unterhalb von folder_path
+    verwerfen würde: Literal-Pattern auf den Ordner (oder einen übergeordneten
+    Ordner) oder ein Glob-Pattern auf einen seiner Pfadteile.
+    """
+    literals, prefixes, suffixes, glob_re = compiled
+    if folder_path in literals or folder_path.startswith(prefixes):
+        return True
+    parts = folder_path.split("/")
+    if suffixes and any(part.endswith(suffixes) for part in parts):
+        return True
+    if glob_re is None:
+        return False
+    return any(glob_re.match(part) for part in parts)
+
+
+def walk_remote(root, folder_path: str = "",
+                excludes: tuple | None = None,
+                cached_state: dict | None = None,
+                new_state: dict | None = None,
+                remote_files: dict | None = None,
+                max_workers: int = 4):
+    """Durchläuft einen iCloud Drive Ordner mit allen Unterordnern.
+
+    folder_path:  Top-Level-Folder aus der Config (z.B. "Documents")
+    excludes:     vorkompilierte Exclude-Pattern (compile_excludes) oder None
+    remote_files: Dict, in das alle Remote-Dateien eingetragen werden (auch
+                  die aus dem Etag-Cache): Ordner (relativ, "" = Folder
+                  selbst) → Set der Dateinamen darin
+    max_workers:  Anzahl gleichzeitiger get_children()-Aufrufe
+
+    Generator: liefert (relativer_pfad, DriveNode) Tupel, sobald sie gefunden
+    werden – nur die Dateien aus neu gescannten Ordnern, die noch geprüft
+    werden müssen. Dateien aus unveränderten Ordnern (Cache-Treffer) landen
+    nur in remote_files. new_state ist erst vollständig, wenn der Generator
+    vollständig durchlaufen wurde; ein Ordner wird erst eingetragen, wenn er
+    samt aller Unterordner fertig gescannt ist.
+
+    Ausgeschlossene Ordner werden vor dem Abstieg verworfen: für sie gibt es
+    weder einen get_children()-Aufruf noch Etag-Einträge im State. Der
+    Ordner folder_path selbst muss vorher geprüft sein (siehe sync_folder).
+
+    Die Ordnerlisten werden in einem Thread-Pool abgerufen und laufen auch
+    weiter, während der Aufrufer einen gelieferten Eintrag verarbeitet; die
+    Auswertung (Excludes, Etag-Cache, State) läuft vollständig im
+    aufrufenden Thread. Die Reihenfolge der Einträge ist nicht festgelegt.
     """
-    if excludes is None:
-        excludes = []
     if cached_state is None:
-        cached_state = {"folder_etags": {}, "folder_files": {}}
+        cached_state = _empty_state()
     if new_state is None:
-        new_state = {"folder_etags": {}, "folder_files": {}}
-    if _counter is None:
-        _counter = [0, 0, 0]  # [dateien, ordner, übersprungen]
-
-    entries = []
-    try:
-        log.debug("Scanne Ordner: %s", rel_path or "/")
-        children = node.get_children()
-    except Exception as exc:
-        log.warning("Konnte Unterordner nicht lesen (%s): %s", rel_path or "/", exc)
-        return entries
-
-    for child in children:
-        child_rel = f"{rel_path}/{child.name}" if rel_path else child.name
-        child_full = f"{folder_path}/{child_rel}" if folder_path else child_rel
-        if excludes and is_excluded(child_rel, child_full, excludes):
-            log.info("  Übersprungen (exclude): %s", child_full)
-            continue
-        if child.type == "folder":
-            _counter[1] += 1
-            child_etag = child.data.get("etag")
-            cached_etag = cached_state["folder_etags"].get(child_rel)
-            cached_files = cached_state["folder_files"].get(child_rel, [])
-
-            if child_etag and cached_etag == child_etag and cached_files:
-                # Ordner unverändert – Dateiliste aus Cache verwenden
-                _counter[2] += 1
-                _counter[0] += len(cached_files)
-                log.info("  Ordner unverändert (etag cache): %s (%d Dateien)",
-                         child_full, len(cached_files))
-                # Gecachte Dateien ohne Node (None) zurückgeben
-                for f in cached_files:
-                    entries.append((f, None))
-                # Cache-Daten in den neuen State übernehmen
-                new_state["folder_etags"][child_rel] = child_etag
-                new_state["folder_files"][child_rel] = cached_files
-                # Auch verschachtelte Ordner-States übernehmen
-                for k, v in cached_state["folder_etags"].items():
-                    if k.startswith(child_rel + "/"):
-                        new_state["folder_etags"][k] = v
-                for k, v in cached_state["folder_files"].items():
-                    if k.startswith(child_rel + "/"):
-                        new_state["folder_files"][k] = v
-            else:
-                log.info("  Scanne Ordner [%d Dateien, %d Ordner, %d aus Cache]: %s",
-                         _counter[0], _counter[1], _counter[2], child_full)
-                sub_entries = walk_remote(child, child_rel, folder_path, excludes,
-                                         cached_state, new_state, _counter)
-                entries.extend(sub_entries)
-                # Etag und Dateiliste für diesen Ordner speichern
-                if child_etag:
-                    new_state["folder_etags"][child_rel] = child_etag
-                    new_state["folder_files"][child_rel] = [
-                        path for path, _ in sub_entries
-                    ]
-        else:
-            _counter[0] += 1
-            entries.append((child_rel, child))
-
-    return entries
+        new_state = _empty_state()
+    if remote_files is None:
+        remote_files = {}
+    num_files = num_folders = num_cached = 0
+
+    # Abschluss-Buchhaltung der gescannten Ordner: offene Arbeit pro Ordner
+    # (eigene Ordnerliste + noch nicht fertige Unterordner), Etags und die
+    # gepackten Dateilisten fertiger bzw. gecachter Unterordner
+    open_count = {"": 1}
+    etags = {}
+    sub_packed = {}
+
+    def finish(rel_path: str) -> None:
+        """Ordner inkl. aller Unterordner fertig gescannt: Dateiliste
+        NUL-getrennt packen (Pfade relativ zum Ordner), in new_state
+        übernehmen und an den Elternordner weiterreichen."""
+        while rel_path:
+            del open_count[rel_path]
+            files = list(remote_files.get(rel_path, ()))
+            for name, packed in sub_packed.pop(rel_path, ()):
+                if packed:
+                    files.extend(f"{name}/{f}" for f in packed.split("\0"))
+            packed = "\0".join(files)
+            etag = etags.pop(rel_path, None)
+            if etag:
+                new_state["folder_etags"][rel_path] = etag
+                new_state["folder_files"][rel_path] = packed
+            parent, _, name = rel_path.rpartition("/")
+            if parent:
+                sub_packed.setdefault(parent, []).append((name, packed))
+            open_count[parent] -= 1
+            if open_count[parent]:
+                return
+            rel_path = parent
+
+    # Größe/Änderungszeit der Dateien unveränderter Ordner übernehmen
+    cached_meta = cached_state.get("file_meta", {})
+    new_meta = new_state.setdefault("file_meta", {})
+
+    # Sortierte Ordner-Keys des Caches: die Unterordner von X liegen dort
+    # zusammenhängend im Bereich ["X/", "X0") ("0" folgt direkt auf "/")
+    cached_keys = sorted(cached_state["folder_etags"])
+
+    # Voller Pfad eines Eintrags = full_prefix + rel_path
+    full_prefix = f"{folder_path}/" if folder_path else ""
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        log.debug("Scanne Ordner: /")
+        pending = {pool.submit(root.get_children): ""}
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    rel_path = pending.pop(future)
+                    try:
+                        children = future.result()
+                    except Exception as exc:
+                        log.warning("Konnte Unterordner nicht lesen (%s): %s", rel_path or "/", exc)
+                        children = ()
+
+                    # Ein Set pro Ordner – der Ordnerpfad wird nur einmal gehalten
+                    names = None
+                    for child in children:
+                        child_rel = f"{rel_path}/{child.name}" if rel_path else child.name
+                        # Ohne Excludes wird der volle Pfad nur für Ordner-Logs gebraucht
+                        if excludes:
+                            child_full = full_prefix + child_rel
+                            if is_excluded(child_rel, child_full, excludes, child.name):
+                                log.info("  Übersprungen (exclude): %s", child_full)
+                                continue
+                        if child.type != "folder":
+                            num_files += 1
+                            if names is None:
+                                names = remote_files.setdefault(rel_path, set())
+                            names.add(child.name)
+                            yield child_rel, child
+                            continue
+
+                        num_folders += 1
+                        child_full = full_prefix + child_rel
+                        child_etag = child.data.get("etag")
+                        cached_etag = cached_state["folder_etags"].get(child_rel)
+                        cached_files = cached_state["folder_files"].get(child_rel, "")
+
+                        if child_etag and cached_etag == child_etag and cached_files:
+                            # Ordner unverändert – Dateiliste aus Cache verwenden
+                            cached_names = cached_files.split("\0")
+                            num_cached += 1
+                            num_files += len(cached_names)
+                            log.info("  Ordner unverändert (etag cache): %s (%d Dateien)",
+                                     child_full, len(cached_names))
+                            # Gecachte Dateien nur als bekannte Pfade übernehmen
+                            for f in cached_names:
+                                sub_dir, _, name = f.rpartition("/")
+                                dir_rel = f"{child_rel}/{sub_dir}" if sub_dir else child_rel
+                                remote_files.setdefault(dir_rel, set()).add(name)
+                                if cached_meta:
+                                    path = f"{child_rel}/{f}"
+                                    meta = cached_meta.get(path)
+                                    if meta is not None:
+                                        new_meta[path] = meta
+                            # Cache-Daten in den neuen State übernehmen
+                            new_state["folder_etags"][child_rel] = child_etag
+                            new_state["folder_files"][child_rel] = cached_files
+                            sub_packed.setdefault(rel_path, []).append((child.name, cached_files))
+                            # Auch verschachtelte Ordner-States übernehmen
+                            lo = bisect.bisect_left(cached_keys, child_rel + "/")
+                            hi = bisect.bisect_left(cached_keys, child_rel + "0", lo)
+                            for k in cached_keys[lo:hi]:
+                                new_state["folder_etags"][k] = cached_state["folder_etags"][k]
+                                if k in cached_state["folder_files"]:
+                                    new_state["folder_files"][k] = cached_state["folder_files"][k]
+                        else:
+                            log.info("  Scanne Ordner [%d Dateien, %d Ordner, %d aus Cache]: %s",
+                                     num_files, num_folders, num_cached, child_full)
+                            # Etag und Dateiliste werden gespeichert, sobald der
+                            # Ordner komplett gescannt ist (finish)
+                            if child_etag:
+                                etags[child_rel] = child_etag
+                            open_count[rel_path] += 1
+                            open_count[child_rel] = 1
+                            log.debug("Scanne Ordner: %s", child_rel)
+                            pending[pool.submit(child.get_children)] = child_rel
+
+                    # Eigene Ordnerliste ist verarbeitet
+                    open_count[rel_path] -= 1
+                    if not open_count[rel_path]:
+                        finish(rel_path)
+        except BaseException:
+            # Abbruch (auch GeneratorExit beim Schließen des Generators):
+            # wartende Ordnerlisten nicht mehr abrufen
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
 
 
 # ---------------------------------------------------------------------------
@@ -262,17 +567,19 @@ def walk_remote(node, rel_path: str = "", folder_path: str = "",
 # ---------------------------------------------------------------------------
 
 def download_file(node, dest_path: Path, dry_run: bool = False,
-                   max_retries: int = 3) -> bool:
+                   max_retries: int = 3, make_parents: bool = True) -> bool:
     """Lädt eine Datei von iCloud Drive herunter.
 
     Bei transienten Fehlern (z.B. 404 ObjectNotFoundException) wird der
     Download bis zu max_retries Mal mit exponentiellem Backoff wiederholt.
+    make_parents=False: Zielverzeichnis existiert bereits (vom Aufrufer angelegt).
     """
     if dry_run:
         log.info("[DRY RUN] Würde herunterladen: %s", dest_path)
         return True
 
-    dest_path.parent.mkdir(parents=True, exist_ok=True)
+    if make_parents:
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
     tmp_path = dest_path.with_suffix(dest_path.suffix + ".tmp")
 
     docwsid = node.data.get("docwsid", "<unbekannt>")
@@ -282,8 +589,8 @@ def download_file(node, dest_path: Path, dry_run: bool = False,
         try:
             with node.open(stream=True) as response:
                 with open(tmp_path, "wb") as f:
-                    copyfileobj(response.raw, f)
-            tmp_path.rename(dest_path)
+                    copyfileobj(response.raw, f, DOWNLOAD_CHUNK_SIZE)
+            os.replace(tmp_path, dest_path)
 
             # Änderungsdatum vom iCloud-Eintrag übernehmen
             if node.date_modified:
@@ -292,17 +599,20 @@ def download_file(node, dest_path: Path, dry_run: bool = False,
 
             return True
         except Exception as exc:
-            if tmp_path.exists():
-                tmp_path.unlink()
+            # Halbe Temp-Datei entfernen (fehlt sie, ist nichts zu tun)
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
 
             if attempt < max_retries:
-                wait = 2 ** attempt  # 2s, 4s, 8s
+                delay = 2 ** attempt  # 2s, 4s, 8s
                 log.warning(
                     "Versuch %d/%d fehlgeschlagen für %s (docwsid=%s, zone=%s): %s "
                     "– Wiederholung in %ds ...",
-                    attempt, max_retries, dest_path, docwsid, zone, exc, wait,
+                    attempt, max_retries, dest_path, docwsid, zone, exc, delay,
                 )
-                time.sleep(wait)
+                time.sleep(delay)
             else:
                 log.error(
                     "Fehler beim Herunterladen von %s nach %d Versuchen "
@@ -314,6 +624,14 @@ def download_file(node, dest_path: Path, dry_run: bool = False,
     return False
 
 
+def remote_meta(node) -> list:
+    """[Größe, Änderungszeit als Timestamp] eines iCloud-Eintrags."""
+    mtime = None
+    if node.date_modified:
+        mtime = node.date_modified.replace(tzinfo=timezone.utc).timestamp()
+    return [node.size, mtime]
+
+
 def file_needs_update(node, local_path: Path) -> bool:
     """Prüft, ob eine lokale Datei aktualisiert werden muss.
 
@@ -339,13 +657,49 @@ def file_needs_update(node, local_path: Path) -> bool:
     return False
 
 
+def _iter_local_files(base: str, dirs: list[str]):
+    """Durchläuft ein lokales Verzeichnis iterativ mit os.scandir.
+
+    Liefert (relativer_ordner, dateiname, absoluter_pfad) für jede Datei;
+    relative Ordner verwenden "/" wie die Remote-Pfade ("" = base selbst).
+    State-Dateien werden ausgelassen, nicht lesbare Verzeichnisse mit einer
+    Warnung übersprungen.
+    Alle Unterverzeichnisse werden in Durchlaufreihenfolge an dirs angehängt
+    (Eltern vor Kindern), sodass reversed(dirs) von innen nach außen geht.
+    """
+    stack = [(base, "")]
+    while stack:
+        dir_abs, dir_rel = stack.pop()
+        # Nicht lesbare Verzeichnisse überspringen (wie zuvor Path.rglob)
+        try:
+            it = os.scandir(dir_abs)
+        except OSError as exc:
+            log.warning("Kann lokales Verzeichnis nicht lesen, überspringe: %s (%s)", dir_abs, exc)
+            continue
+        with it:
+            for entry in it:
+                # Typ kommt aus readdir, nur Symlinks brauchen ein stat()
+                if entry.is_dir():
+                    if not entry.is_symlink():
+                        dirs.append(entry.path)
+                        rel = f"{dir_rel}/{entry.name}" if dir_rel else entry.name
+                        stack.append((entry.path, rel))
+                    continue
+                if entry.name.startswith(".icloud-backup-state"):
+                    continue
+                yield dir_rel, entry.name, entry.path
+
+
 def sync_folder(drive, folder_path: str, destination: str,
                 excludes: list[str] | None = None,
-                dry_run: bool = False, full_scan: bool = False) -> dict:
+                dry_run: bool = False, full_scan: bool = False,
+                parallel_downloads: int = 8, parallel_scans: int = 4) -> dict:
     """Synchronisiert einen iCloud Drive Ordner ins Zielverzeichnis.
 
     Gibt Statistiken zurück: {downloaded, deleted, skipped, errors}
     folder_path "/" oder "" bedeutet iCloud-Drive-Root.
+    parallel_downloads: Anzahl gleichzeitiger Downloads (Thread-Pool)
+    parallel_scans:     Anzahl gleichzeitig abgefragter Ordnerlisten
     """
     # Normalisieren: "/" → "" (Root)
     folder_path = folder_path.strip("/")
@@ -358,6 +712,9 @@ def sync_folder(drive, folder_path: str, destination: str,
 
     log.info("Synchronisiere '%s' → %s", folder_path or "(Root)", dest_base)
 
+    # Exclude-Pattern einmalig vorbereiten
+    compiled_excludes = compile_excludes(excludes) if excludes else None
+
     # Remote-Ordner auflösen
     remote_root = resolve_drive_folder(drive, folder_path)
     if remote_root is None:
@@ -365,58 +722,132 @@ def sync_folder(drive, folder_path: str, destination: str,
         return stats
 
     # Etag-Cache laden
-    cached_state = {} if full_scan else load_state(destination, folder_path)
-    new_state = {"folder_etags": {}, "folder_files": {}}
-
-    # Alle Remote-Dateien sammeln
-    log.info("Lese Dateiliste von iCloud Drive/%s (kann bei vielen Ordnern dauern) ...", folder_path)
-    remote_files = walk_remote(remote_root, folder_path=folder_path,
-                               excludes=excludes or [],
-                               cached_state=cached_state, new_state=new_state)
-    log.info("Scan abgeschlossen: %d Dateien gefunden", len(remote_files))
-    remote_paths = set()
-
-    for rel_path, node in remote_files:
-        remote_paths.add(rel_path)
-        local_path = dest_base / rel_path
-
-        if node is None:
-            # Aus Cache – Datei war in einem unveränderten Ordner.
-            # Lokale Datei existiert bereits (wurde beim letzten Sync heruntergeladen).
-            log.debug("Unverändert (cache): %s", rel_path)
-            stats["skipped"] += 1
-        elif file_needs_update(node, local_path):
-            log.info("Herunterladen: %s", rel_path)
-            if download_file(node, local_path, dry_run):
+    cached_state = _empty_state() if full_scan else load_state(destination, folder_path)
+    new_state = _empty_state()
+
+    cached_meta = cached_state.get("file_meta", {})
+    new_meta = new_state["file_meta"]
+
+    def collect(futures) -> None:
+        for future in futures:
+            rel_path, meta = downloads.pop(future)
+            if future.result():
                 stats["downloaded"] += 1
+                new_meta[rel_path] = meta
             else:
                 stats["errors"] += 1
-        else:
-            log.debug("Unverändert: %s", rel_path)
-            stats["skipped"] += 1
+
+    # Remote-Dateien sammeln und parallel herunterladen. Scan und Downloads
+    # überlappen: Downloads starten, während weitere Ordner gelesen werden.
+    remote_files = {}
+    # Ist der Ordner selbst ausgeschlossen, entfällt der Remote-Scan; wie bei
+    # einzeln ausgeschlossenen Dateien wird die lokale Kopie entfernt
+    if compiled_excludes and folder_path and is_folder_excluded(folder_path,
+                                                                compiled_excludes):
+        log.info("  Übersprungen (exclude): %s", folder_path)
+        entries = ()
+    else:
+        log.info("Lese Dateiliste von iCloud Drive/%s (kann bei vielen Ordnern dauern) ...",
+                 folder_path)
+        entries = walk_remote(remote_root, folder_path=folder_path,
+                              excludes=compiled_excludes,
+                              cached_state=cached_state, new_state=new_state,
+                              remote_files=remote_files,
+                              max_workers=parallel_scans)
+    num_checked = 0
+    created_dirs = set()  # Zielverzeichnisse, die sicher existieren
+    next_checkpoint = time.monotonic() + CHECKPOINT_INTERVAL
+    with ThreadPoolExecutor(max_workers=max(1, parallel_downloads)) as pool:
+        downloads = {}  # Future → (rel_path, meta)
+        try:
+            for rel_path, node in entries:
+                num_checked += 1
+                meta = remote_meta(node)
+
+                # Größe und Änderungszeit wie beim letzten Sync → lokale Datei
+                # ist aktuell, ohne sie per stat() zu prüfen
+                if cached_meta.get(rel_path) == meta:
+                    log.debug("Unverändert (cache): %s", rel_path)
+                    new_meta[rel_path] = meta
+                    stats["skipped"] += 1
+                    continue
+
+                local_path = dest_base / rel_path
+                if file_needs_update(node, local_path):
+                    log.info("Herunterladen: %s", rel_path)
+                    # Zielverzeichnis einmal pro Ordner anlegen statt pro Datei
+                    parent = local_path.parent
+                    if not dry_run and parent not in created_dirs:
+                        try:
+                            parent.mkdir(parents=True, exist_ok=True)
+                        except OSError as exc:
+                            log.error("Konnte Verzeichnis nicht anlegen %s: %s", parent, exc)
+                            stats["errors"] += 1
+                            continue
+                        created_dirs.add(parent)
+                    future = pool.submit(download_file, node, local_path, dry_run,
+                                         make_parents=False)
+                    downloads[future] = (rel_path, meta)
+                    # Begrenzen, damit bei großen Änderungen nicht alle Nodes
+                    # gleichzeitig in der Warteschlange liegen
+                    if len(downloads) >= MAX_PENDING_DOWNLOADS:
+                        done, _ = wait(downloads, return_when=FIRST_COMPLETED)
+                        collect(done)
+                else:
+                    log.debug("Unverändert: %s", rel_path)
+                    new_meta[rel_path] = meta
+                    stats["skipped"] += 1
+
+                # Bei langen Syncs regelmäßig einen Zwischenstand sichern, damit
+                # ein Abbruch nicht den ganzen Scan-Fortschritt kostet. Vorher
+                # laufende Downloads abschließen, damit nur Erledigtes im State steht.
+                if not dry_run and time.monotonic() >= next_checkpoint:
+                    collect(as_completed(list(downloads)))
+                    if stats["errors"] == 0:
+                        save_state(destination, folder_path,
+                                   _checkpoint_state(cached_state, new_state))
+                        log.info("Zwischenstand gespeichert (%d Dateien geprüft)", num_checked)
+                    next_checkpoint = time.monotonic() + CHECKPOINT_INTERVAL
+
+            num_remote = sum(len(names) for names in remote_files.values())
+            log.info("Scan abgeschlossen: %d Dateien gefunden", num_remote)
+            collect(as_completed(list(downloads)))
+        except BaseException:
+            # Abbruch (Ctrl-C) oder Fehler: wartende Downloads verwerfen, statt
+            # sie beim Verlassen des Pools noch alle abzuarbeiten. Auch den Scan
+            # beenden, damit keine weiteren Ordnerlisten abgerufen werden.
+            pool.shutdown(wait=False, cancel_futures=True)
+            close_walk = getattr(entries, "close", None)
+            if close_walk:
+                close_walk()
+            raise
+
+    # Aus Cache – Dateien in unveränderten Ordnern. Lokale Dateien existieren
+    # bereits (wurden beim letzten Sync heruntergeladen).
+    stats["skipped"] += num_remote - num_checked
 
     # Lokale Dateien entfernen, die auf iCloud Drive nicht mehr existieren
     if dest_base.exists():
-        for local_file in sorted(dest_base.rglob("*")):
-            if local_file.is_dir():
-                continue
-            if local_file.name.startswith(".icloud-backup-state"):
-                continue
-            rel = str(local_file.relative_to(dest_base))
-            if rel not in remote_paths:
+        local_dirs = []
+        for dir_rel, name, local_file in _iter_local_files(str(dest_base), local_dirs):
+            if name not in remote_files.get(dir_rel, ()):
+                rel = f"{dir_rel}/{name}" if dir_rel else name
                 if dry_run:
                     log.info("[DRY RUN] Würde löschen: %s", local_file)
                 else:
                     log.info("Lösche (nicht mehr auf iCloud): %s", rel)
-                    local_file.unlink()
+                    os.unlink(local_file)
                 stats["deleted"] += 1
 
-        # Leere Verzeichnisse aufräumen
+        # Leere Verzeichnisse aufräumen (innerste zuerst); os.rmdir schlägt
+        # bei nicht-leeren Verzeichnissen fehl, ein eigener Test entfällt
         if not dry_run:
-            for dirpath in sorted(dest_base.rglob("*"), reverse=True):
-                if dirpath.is_dir() and not any(dirpath.iterdir()):
-                    dirpath.rmdir()
-                    log.debug("Leeres Verzeichnis entfernt: %s", dirpath)
+            for dirpath in reversed(local_dirs):
+                try:
+                    os.rmdir(dirpath)
+                except OSError:
+                    continue
+                log.debug("Leeres Verzeichnis entfernt: %s", dirpath)
 
     # State speichern (nur bei echtem Lauf ohne Fehler)
     if not dry_run and stats["errors"] == 0:
@@ -440,6 +871,8 @@ def run_job(job: dict, global_settings: dict) -> bool:
     excludes = job.get("exclude", [])
     dry_run = global_settings.get("dry_run", False)
     full_scan = global_settings.get("full_scan", False)
+    parallel_downloads = global_settings.get("parallel_downloads", 8)
+    parallel_scans = global_settings.get("parallel_scans", 4)
 
     log.info("=" * 60)
     log.info("Job: %s", name)
@@ -452,9 +885,15 @@ def run_job(job: dict, global_settings: dict) -> bool:
     except Exception:
         return False
 
+    # Scan- und Download-Threads teilen sich die Session: Speichern
+    # serialisieren, eine Verbindung pro gleichzeitigem Thread
+    guard_session_persistence(api)
+    configure_http_pool(api, parallel_downloads + parallel_scans)
+
     total_stats = {"downloaded": 0, "deleted": 0, "skipped": 0, "errors": 0}
     for folder in folders:
-        stats = sync_folder(api.drive, folder, destination, excludes, dry_run, full_scan)
+        stats = sync_folder(api.drive, folder, destination, excludes, dry_run, full_scan,
+                            parallel_downloads, parallel_scans)
         for key in total_stats:
             total_stats[key] += stats[key]
 
@@ -575,6 +1014,27 @@ def cmd_select_folders(config: dict, config_path: str, job_filter: str | None =
 # CLI
 # ---------------------------------------------------------------------------
 
+class _CachedTimeFormatter(logging.Formatter):
+    """logging.Formatter, der den Zeitstempel höchstens einmal pro Sekunde formatiert.
+
+    Beim Scan entstehen viele Log-Zeilen pro Sekunde; sie teilen sich das
+    strftime-Ergebnis. Nur mit sekundengenauem datefmt (ohne %f) – die
+    Ausgabe ist identisch zu logging.Formatter (lokale Zeit).
+    """
+
+    _cache = (None, None, "")  # (Sekunde, datefmt, formatierter Zeitstempel)
+
+    def formatTime(self, record, datefmt=None):
+        if not datefmt:
+            return super().formatTime(record, datefmt)
+        second = int(record.created)
+        cached_second, cached_datefmt, formatted = self._cache
+        if second != cached_second or datefmt != cached_datefmt:
+            formatted = time.strftime(datefmt, self.converter(second))
+            self._cache = (second, datefmt, formatted)
+        return formatted
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="iCloud Drive Backup – Synchronisiert iCloud Drive Ordner auf ein lokales Zielverzeichnis."
@@ -617,10 +1077,13 @@ def main():
 
     # Log-Level setzen (vor allem für auth-only/select-folders relevant)
     log_level = "DEBUG" if args.verbose else "INFO"
+    handler = logging.StreamHandler()
+    handler.setFormatter(_CachedTimeFormatter(
+        "%(asctime)s [%(levelname)s] %(message)s", datefmt="%Y-%m-%d %H:%M:%S",
+    ))
     logging.basicConfig(
         level=getattr(logging, log_level.upper(), logging.INFO),
-        format="%(asctime)s [%(levelname)s] %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
+        handlers=[handler],
     )
 
     config = load_config(args.config)